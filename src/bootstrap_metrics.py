@@ -0,0 +1,245 @@
+# This script computes bootstrap confidence intervals for the weighted classification metrics
+# (f1, precision, recall) of already cached predictions, e.g. of the final pipeline on the val set
+    # Resampling n (true, pred) pairs with replacement is the same as drawing the cells of the
+    # confusion matrix from a multinomial distribution, so no replicate has to be re-scored row by row
+# There is also a paired variant to check if a second (e.g. faster) model is "as good" as the first one
+
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# number of replicates handled by one task of the process pool
+# fixed chunks keep the results reproducible independent of the number of workers
+CHUNK_SIZE = 500
+
+METRICS = ['f1', 'precision', 'recall']
+
+##################################
+def encode_labels(*label_arrays, labels=None):
+    '''Encodes one or more label arrays to integer codes sharing the same label order.
+
+    Args:
+        *label_arrays (array-like): Arrays of labels (e.g. target_val and predictions).
+        labels (list): Optional label order; by default the sorted union of all given labels.
+
+    Returns:
+        codes (list): List of np.ndarray with the integer codes of each input array.
+        labels (np.ndarray): The labels belonging to the codes 0..k-1.
+
+    '''
+
+    arrays = [np.asarray(arr, dtype=object) for arr in label_arrays]
+
+    # get label order (sorted union like sklearn does)
+    if labels is None:
+        labels = np.unique(np.concatenate(arrays))
+    labels = np.asarray(labels, dtype=object)
+
+    # map labels to codes; unknown labels are not allowed
+    label_to_code = {label: code for code, label in enumerate(labels)}
+    codes = []
+    for arr in arrays:
+        try:
+            codes.append(np.fromiter((label_to_code[label] for label in arr), dtype=np.int64, count=len(arr)))
+        except KeyError as err:
+            raise ValueError(f'Label {err.args[0]!r} is not part of labels.') from None
+
+    return codes, labels
+
+##################################
+def weighted_scores(confusion_matrices):
+    '''Computes weighted precision, recall and f1 for a stack of confusion matrices at once.
+    Matches sklearn's average='weighted' with zero_division=0.
+
+    Args:
+        confusion_matrices (np.ndarray): Array of shape (k, k) or (n_replicates, k, k),
+            rows are true labels, columns are predicted labels.
+
+    Returns:
+        scores (dict): Dict with 'f1', 'precision' and 'recall' as np.ndarray (one value per matrix).
+
+    '''
+
+    cms = np.asarray(confusion_matrices, dtype=np.float64)
+    if cms.ndim == 2:
+        cms = cms[np.newaxis]
+
+    # per class counts
+    tp = np.diagonal(cms, axis1=1, axis2=2)
+    support = cms.sum(axis=2)
+    predicted = cms.sum(axis=1)
+
+    # per class scores, zero where the denominator is zero
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precision = np.where(predicted > 0, tp / predicted, 0.0)
+        recall = np.where(support > 0, tp / support, 0.0)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+
+    # weight every class by its support
+    n_samples = support.sum(axis=1, keepdims=True)
+    weights = np.divide(support, n_samples, out=np.zeros_like(support), where=n_samples > 0)
+
+    return {
+        'f1': (f1 * weights).sum(axis=1),
+        'precision': (precision * weights).sum(axis=1),
+        'recall': (recall * weights).sum(axis=1),
+    }
+
+##################################
+def _resample_chunk(cell_counts, n_replicates, seed):
+    '''Draws n_replicates resampled cell count tables from the observed ones (worker function of the pool).
+
+    Args:
+        cell_counts (np.ndarray): Observed counts of the flattened cells.
+        n_replicates (int): Number of replicates to draw.
+        seed (np.random.SeedSequence): Seed of this chunk.
+
+    Returns:
+        resampled (np.ndarray): Array of shape (n_replicates, n_cells).
+
+    '''
+
+    rng = np.random.default_rng(seed)
+    n_samples = int(cell_counts.sum())
+
+    return rng.multinomial(n_samples, cell_counts / n_samples, size=n_replicates)
+
+##################################
+def _resample_cells(cell_counts, n_replicates, random_state, n_jobs):
+    '''Resamples the cell counts in fixed sized chunks, optionally in a process pool.'''
+
+    # split replicates into chunks with their own seeds
+    chunk_sizes = [CHUNK_SIZE] * (n_replicates // CHUNK_SIZE)
+    if n_replicates % CHUNK_SIZE:
+        chunk_sizes.append(n_replicates % CHUNK_SIZE)
+    seeds = np.random.SeedSequence(random_state).spawn(len(chunk_sizes))
+
+    if n_jobs is None or n_jobs < 1:
+        n_jobs = os.cpu_count() or 1
+    n_jobs = min(n_jobs, len(chunk_sizes))
+
+    # run in this process if there is nothing to parallelize
+    if n_jobs == 1:
+        chunks = [_resample_chunk(cell_counts, size, seed) for size, seed in zip(chunk_sizes, seeds)]
+    else:
+        # spawn instead of fork, the parent may run threads (e.g. of pyarrow or BLAS)
+        with ProcessPoolExecutor(max_workers=n_jobs, mp_context=multiprocessing.get_context('spawn')) as executor:
+            chunks = list(executor.map(_resample_chunk, [cell_counts] * len(chunk_sizes), chunk_sizes, seeds))
+
+    return np.concatenate(chunks)
+
+##################################
+def _summarize(point_scores, replicate_scores, confidence):
+    '''Creates the result DataFrame with point estimate and percentile interval per metric.'''
+
+    alpha = (1 - confidence) / 2
+
+    rows = []
+    for metric in METRICS:
+        lower, upper = np.quantile(replicate_scores[metric], [alpha, 1 - alpha])
+        rows.append({
+            'metric': metric,
+            'score': float(point_scores[metric][0]),
+            'lower': float(lower),
+            'upper': float(upper),
+            'std': float(replicate_scores[metric].std(ddof=1)),
+        })
+
+    return pd.DataFrame(rows)
+
+##################################
+def bootstrap_metrics(target, predictions, n_replicates=2000, confidence=0.95, random_state=42, n_jobs=1, labels=None):
+    '''Computes percentile bootstrap confidence intervals for weighted f1, precision and recall
+    of cached predictions (e.g. target_val and pipeline.predict(features_val)).
+
+    Args:
+        target (array-like): True labels.
+        predictions (array-like): Predicted labels.
+        n_replicates (int): Number of bootstrap replicates (default is 2000).
+        confidence (float): Confidence level of the intervals (default is 0.95).
+        random_state (int): Seed for reproducible intervals (default is 42).
+        n_jobs (int): Number of worker processes (default is 1, no pool); None or < 1 uses all cpus.
+            Drawing is fast, a pool only pays off for very many replicates.
+        labels (list): Optional label order, by default the union of target and predictions.
+
+    Returns:
+        df_intervals (pd.DataFrame): One row per metric with the columns 'metric', 'score'
+            (on the full data), 'lower', 'upper' and 'std' (of the replicates).
+
+    '''
+
+    if len(target) != len(predictions):
+        raise ValueError('target and predictions must have the same length.')
+    if len(target) == 0:
+        raise ValueError('target and predictions must not be empty.')
+    if not 0 < confidence < 1:
+        raise ValueError('confidence must be between 0 and 1.')
+    if n_replicates < 2:
+        raise ValueError('n_replicates must be at least 2.')
+
+    (true_codes, pred_codes), labels = encode_labels(target, predictions, labels=labels)
+    k = len(labels)
+
+    # observed confusion matrix as flattened cell counts
+    cell_counts = np.bincount(true_codes * k + pred_codes, minlength=k * k)
+
+    # resample the confusion matrices and score all replicates at once
+    resampled = _resample_cells(cell_counts, n_replicates, random_state, n_jobs)
+    replicate_scores = weighted_scores(resampled.reshape(-1, k, k))
+    point_scores = weighted_scores(cell_counts.reshape(k, k))
+
+    return _summarize(point_scores, replicate_scores, confidence)
+
+##################################
+def bootstrap_metrics_difference(target, predictions_a, predictions_b, n_replicates=2000, confidence=0.95, random_state=42, n_jobs=1, labels=None):
+    '''Computes paired bootstrap confidence intervals for the difference (b - a) of weighted f1, precision
+    and recall of two models scored on the same rows. If the interval of a metric contains 0 (or lies
+    above a tolerated loss), model b can be seen as "as good" as model a.
+
+    Args:
+        target (array-like): True labels.
+        predictions_a (array-like): Predicted labels of the reference model.
+        predictions_b (array-like): Predicted labels of the compared model.
+        n_replicates (int): Number of bootstrap replicates (default is 2000).
+        confidence (float): Confidence level of the intervals (default is 0.95).
+        random_state (int): Seed for reproducible intervals (default is 42).
+        n_jobs (int): Number of worker processes (default is 1, no pool); None or < 1 uses all cpus.
+            Drawing is fast, a pool only pays off for very many replicates.
+        labels (list): Optional label order, by default the union of all given labels.
+
+    Returns:
+        df_intervals (pd.DataFrame): One row per metric with the columns 'metric', 'score'
+            (difference on the full data), 'lower', 'upper' and 'std' (of the replicates).
+
+    '''
+
+    if not len(target) == len(predictions_a) == len(predictions_b):
+        raise ValueError('target and predictions must have the same length.')
+    if len(target) == 0:
+        raise ValueError('target and predictions must not be empty.')
+    if not 0 < confidence < 1:
+        raise ValueError('confidence must be between 0 and 1.')
+    if n_replicates < 2:
+        raise ValueError('n_replicates must be at least 2.')
+
+    (true_codes, a_codes, b_codes), labels = encode_labels(target, predictions_a, predictions_b, labels=labels)
+    k = len(labels)
+
+    # joint cells of (true, pred_a, pred_b), so both models see the same resampled rows
+    cell_counts = np.bincount((true_codes * k + a_codes) * k + b_codes, minlength=k ** 3)
+
+    # resample the joint cells, then marginalize to one confusion matrix per model
+    resampled = _resample_cells(cell_counts, n_replicates, random_state, n_jobs).reshape(-1, k, k, k)
+    scores_a = weighted_scores(resampled.sum(axis=3))
+    scores_b = weighted_scores(resampled.sum(axis=2))
+    replicate_scores = {metric: scores_b[metric] - scores_a[metric] for metric in METRICS}
+
+    observed = cell_counts.reshape(k, k, k)
+    point_a = weighted_scores(observed.sum(axis=2))
+    point_b = weighted_scores(observed.sum(axis=1))
+    point_scores = {metric: point_b[metric] - point_a[metric] for metric in METRICS}
+
+    return _summarize(point_scores, replicate_scores, confidence)
@@ -5,7 +5,6 @@
 
 #importing modules
 import os, sys
-import pandas as pd
 from matplotlib import pyplot as plt
 import seaborn as sns
 
@@ -16,8 +15,9 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 if project_root not in sys.path:
     sys.path.append(project_root)
 
-from src.data_prep_for_model import clean_data, feature_engineer, prep_data_for_model, pipeline_classifier
+from src.data_prep_for_model import load_data, clean_data, feature_engineer, pipeline_classifier
 from src.final_model import final_pipeline, get_feature_importances
+from src.prep_cache import cached_prep_data_for_model
 
 # global constants
 DPI = 100
@@ -312,12 +312,12 @@ def get_plots_dir(subfolder='plots'):
 # %% main
 if __name__ == "__main__":
     print("load data")
-    data = pd.read_csv('data/spotify_dataset.csv')
+    data = load_data('data/spotify_dataset.csv')
     data_clean = clean_data(data)
 
     print("prepare data for model")
-    # prepare data for model
-    features_train, target_train, features_test, target_test, features_val, target_val = prep_data_for_model(data)
+    # prepare data for model (loaded from the cache if data and prep code are unchanged)
+    features_train, target_train, features_test, target_test, features_val, target_val = cached_prep_data_for_model(data)
 
     # CAT_COLS and NUM_COLS for feature engineering / one-hot-encoding
     CAT_COLS_FINAL = ['key', 'time_signature']
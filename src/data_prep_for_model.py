@@ -1,27 +1,82 @@
 # The first functions are used for the data prep steps for a given dataset
     # Steps:
-        # Train-Test-Split; Cleaning data; Feature Engineering; Get features and target for train, test and val data
+        # Loading data; Train-Test-Split (as index arrays); Cleaning data; Feature Engineering; Get features and target for train, test and val data
 # The last function computes the pipeline with included preprocessing, to quickly try out different models in a notebook
 
+import importlib.util
+import numpy as np
 import pandas as pd
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import train_test_split, KFold, StratifiedKFold
 from sklearn.pipeline import Pipeline
 from sklearn.compose import ColumnTransformer
 from sklearn.preprocessing import OneHotEncoder, StandardScaler
 
+# list of features to drop before modeling (identifiers, raw strings and target columns)
+FEATURES_TO_DROP = [
+    'track_id',
+    'artists',
+    'album_name',
+    'track_name',
+    'track_genre',
+    'popularity',
+    'popularity_cat']
+
+# string columns with many repeated values are loaded as categorical (integer codes + unique strings once)
+CATEGORY_COLS = ['artists', 'album_name', 'track_genre']
+
+# mostly unique string columns are loaded as Arrow-backed strings if pyarrow is installed
+STRING_DTYPE = 'string[pyarrow]' if importlib.util.find_spec('pyarrow') is not None else 'string'
+STRING_COLS = ['track_id', 'track_name']
+
+##################################
+def load_data(path, chunksize=None):
+    '''Loads the spotify dataset with memory-efficient dtypes for the string columns.
+
+    Args:
+        path (str): Path to the csv file (e.g. 'data/spotify_dataset.csv').
+        chunksize (int): Optional number of rows per chunk to stream the file (default is None).
+
+    Returns:
+        df (pd.DataFrame): The loaded DataFrame (or a reader of DataFrames if chunksize is set).
+
+    '''
+
+    dtypes = {col: 'category' for col in CATEGORY_COLS}
+    dtypes.update({col: STRING_DTYPE for col in STRING_COLS})
+
+    return pd.read_csv(path, dtype=dtypes, chunksize=chunksize)
+
 ##################################
-def clean_data(df_input):
+def popularity_categories(popularity):
+    '''Categorizes popularity into four ranges (unknown = -1-0, low = 1-25, medium = 26-74, high = 75-100).
+
+    Args:
+        popularity (pd.Series): Numeric popularity values.
+
+    Returns:
+        popularity_cat (pd.Series): Categorical popularity.
+
+    '''
+
+    return pd.cut(popularity,
+                  bins=[-1, 0, 25, 74, 100],
+                  labels=['Unknown', 'Low', 'Medium', 'High'])
+
+##################################
+def clean_data(df_input, copy=True):
     '''Cleans the dataset by removing duplicates and NaN values.
 
     Args:
         df_input (pd.DataFrame): The input DataFrame to be cleaned.
+        copy (bool): Copy the input DataFrame first (default is True). Only set to False
+            if the input is not used anymore, e.g. a slice taken by prep_split.
     
     Returns:
         df (pd.DataFrame): The cleaned DataFrame with duplicates and NaN values removed.
         
     '''
     # copy input dataframe first
-    df = df_input.copy()
+    df = df_input.copy() if copy else df_input
 
     # remove unnecessary column if it exists
     if 'Unnamed: 0' in df.columns:
@@ -41,14 +96,12 @@ def clean_data(df_input):
     df['explicit'] = df['explicit'].astype(int)
 
     # Use pd.cut to categorize popularity into four ranges (unknown = -1-0, low = 1-25, medium = 26-74, high = 75-100)
-    df['popularity_cat'] = pd.cut(df['popularity'],
-                                        bins=[-1, 0, 25, 74, 100],
-                                        labels=['Unknown', 'Low', 'Medium', 'High'])
+    df['popularity_cat'] = popularity_categories(df['popularity'])
 
     return df
 
 ##################################
-def feature_engineer(df_input):
+def feature_engineer(df_input, copy=True):
     '''Feature engineering by creating new columns that are more suitable for machine learning models.
     They are derived from categorical columns with too many unique values.
     New features:
@@ -57,10 +110,12 @@ def feature_engineer(df_input):
         - tracks_per_genre: Getting count frequency of 'track_genre' per track_id
         - track_name_length: Length of the track name (by getting the length of the strings in 'track_name')
         - album_name_length: Length of the album name (by getting the length of the strings in 'album_name')
+    Categorical columns (see load_data) are counted and measured on their integer codes and unique strings.
 
     Args:
         df_input (pd.DataFrame): The (cleaned) input DataFrame to feature engineer.
-        
+        copy (bool): Copy the input DataFrame first (default is True). If False,
+            the new columns are added to the input DataFrame.
     
     Returns:
         df (pd.DataFrame): The engineered DataFrame with the new features as columns.
@@ -68,30 +123,150 @@ def feature_engineer(df_input):
     '''
 
     # copy input dataframe first
-    df = df_input.copy()
+    df = df_input.copy() if copy else df_input
 
     # create tracks_per_artist feature
-    df['tracks_per_artist'] = df.groupby('artists')['track_id'].transform('count')
+    if isinstance(df['artists'].dtype, pd.CategoricalDtype):
+        # count the integer codes instead of hashing the strings
+        codes = df['artists'].cat.codes.to_numpy()
+        valid = (codes >= 0) & df['track_id'].notna().to_numpy()
+        counts = np.bincount(codes[valid], minlength=len(df['artists'].cat.categories))
+        df['tracks_per_artist'] = _map_codes(df['artists'], counts)
+    else:
+        df['tracks_per_artist'] = df.groupby('artists')['track_id'].transform('count')
 
     # create track_name_length feature
-    df['track_name_length'] = df['track_name'].str.len()
+    df['track_name_length'] = _string_lengths(df['track_name'])
 
     # create album_name_length feature
-    df['album_name_length'] = df['album_name'].str.len()
+    df['album_name_length'] = _string_lengths(df['album_name'])
 
     return df
 
 ##################################
-def prep_data_for_model(df_input):
+def _map_codes(series, values):
+    '''Maps the codes of a categorical series to one value per category (NaN for missing values).'''
+
+    codes = series.cat.codes.to_numpy()
+    mapped = pd.Series(np.asarray(values)[codes], index=series.index)
+
+    return mapped.where(codes >= 0) if (codes < 0).any() else mapped
+
+##################################
+def _string_lengths(series):
+    '''Gets the lengths of the strings of a series; for categorical series only the unique strings are measured.'''
+
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return _map_codes(series, series.cat.categories.str.len())
+
+    lengths = series.str.len()
+
+    # nullable Int64 of the 'string' dtypes back to numpy dtypes like for object columns
+    if isinstance(lengths.dtype, pd.api.extensions.ExtensionDtype):
+        lengths = lengths.astype('float64') if lengths.isna().any() else lengths.astype('int64')
+
+    return lengths
+
+##################################
+def split_indices(df_input, test_size=0.3, val_size=0.33, stratify=False, random_state=42):
+    '''Splits the rows of the dataset into train, test and val sets as index arrays instead of DataFrames.
+    Without stratification the sets are the same as train_test_split on the DataFrame gives.
+
+    Args:
+        df_input (pd.DataFrame): The input DataFrame to be split.
+        test_size (float): Share of all rows for test and val data (default is 0.3).
+        val_size (float): Share of the test rows moved to the val data (default is 0.33).
+        stratify (bool): Stratify the splits on the popularity categories (default is False).
+        random_state (int): Seed for reproducible splits (default is 42).
+
+    Returns:
+        idx_train (np.ndarray): Row positions of the train set.
+        idx_test (np.ndarray): Row positions of the test set.
+        idx_val (np.ndarray): Row positions of the val set.
+
+    '''
+
+    idx = np.arange(len(df_input))
+    labels = _stratify_labels(df_input) if stratify else None
+
+    # First train-Test-Split
+    idx_train, idx_test = train_test_split(idx, test_size=test_size, random_state=random_state,
+                                           stratify=labels)
+
+    # Second Train-Test-Split for val data
+    idx_test, idx_val = train_test_split(idx_test, test_size=val_size, random_state=random_state,
+                                         stratify=labels[idx_test] if stratify else None)
+
+    return idx_train, idx_test, idx_val
+
+##################################
+def kfold_indices(df_input, idx, n_splits=5, stratify=False, random_state=42):
+    '''Splits an index array (e.g. idx_train of split_indices) into k folds, so tuning code
+    can reuse the same index sets for cross validation.
+
+    Args:
+        df_input (pd.DataFrame): The input DataFrame the index array belongs to.
+        idx (np.ndarray): Row positions to split into folds.
+        n_splits (int): Number of folds (default is 5).
+        stratify (bool): Stratify the folds on the popularity categories (default is False).
+        random_state (int): Seed for reproducible folds (default is 42).
+
+    Returns:
+        folds (list): List of (idx_fit, idx_eval) tuples with row positions of df_input.
+
+    '''
+
+    idx = np.asarray(idx)
+
+    if stratify:
+        kfold = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+        splits = kfold.split(idx, _stratify_labels(df_input)[idx])
+    else:
+        kfold = KFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+        splits = kfold.split(idx)
+
+    return [(idx[fit], idx[evaluate]) for fit, evaluate in splits]
+
+##################################
+def _stratify_labels(df_input):
+    '''Gets the popularity categories of the raw rows as array for stratification.'''
+
+    return np.asarray(popularity_categories(df_input['popularity']))
+
+##################################
+def prep_split(df_input, idx):
+    '''Preps the rows of one index set (cleaning, feature engineering, features and target).
+    Only the rows of this set are taken from the input DataFrame, once.
+
+    Args:
+        df_input (pd.DataFrame): The input DataFrame (not changed).
+        idx (np.ndarray): Row positions of the set (e.g. from split_indices or kfold_indices).
+
+    Returns:
+        features (pd.DataFrame): Features of the set.
+        target (pd.Series): Target of the set.
+
+    '''
+
+    # taking the rows creates a new DataFrame, so the following steps don't need to copy again
+    df = clean_data(df_input.iloc[idx], copy=False)
+    df = feature_engineer(df, copy=False)
+
+    return df.drop(FEATURES_TO_DROP, axis = 1), df['popularity_cat']
+
+##################################
+def prep_data_for_model(df_input, stratify=False):
     '''Preps the dataset by using all usual steps of preparing the dataset so a model can be trained on.
     Includes the steps:
-        1 Train-Test-Split
+        1 Train-Test-Split (as index arrays)
         2 Cleaning data
         3 Feature Engineering
         4 Get features and target for train, test and val data
+    Steps 2 - 4 run for one set after another on its rows only.
 
     Args:
         df_input (pd.DataFrame): The input DataFrame to be prepped.
+        stratify (bool): Stratify the splits on the popularity categories (default is False).
     
     Returns:
         features_train (pd.DataFrame): Features of train set.
@@ -103,44 +278,13 @@ def prep_data_for_model(df_input):
         
     '''
 
-    # copy input dataframe first
-    df = df_input.copy()
-
-    # First train-Test-Split
-    df_train, df_test = train_test_split(df, test_size = 0.3, random_state = 42)
-
-    # Second Train-Test-Split for val data
-    df_test, df_val = train_test_split(df_test, test_size=0.33, random_state = 42)
-
-    #apply clean_data function on train, test and val data
-    df_train_cleaned = clean_data(df_train)
-    df_test_cleaned = clean_data(df_test)
-    df_val_cleaned = clean_data(df_val)
-
-    #apply feature_engineer function on train, test and val data
-    df_train_final = feature_engineer(df_train_cleaned)
-    df_test_final = feature_engineer(df_test_cleaned)
-    df_val_final = feature_engineer(df_val_cleaned)
-
-    # create list of features to drop
-    features_to_drop = [
-        'track_id',
-        'artists',
-        'album_name',
-        'track_name',
-        'track_genre',
-        'popularity',
-        'popularity_cat']
-    
-    # split train, test and val data into features and target
-    features_train = df_train_final.drop(features_to_drop, axis = 1)
-    target_train = df_train_final['popularity_cat']
-
-    features_test = df_test_final.drop(features_to_drop, axis = 1)
-    target_test = df_test_final['popularity_cat']
+    # Train-Test-Split for train, test and val data
+    idx_train, idx_test, idx_val = split_indices(df_input, stratify=stratify)
 
-    features_val = df_val_final.drop(features_to_drop, axis = 1)
-    target_val = df_val_final['popularity_cat']
+    # clean, feature engineer and split train, test and val data into features and target
+    features_train, target_train = prep_split(df_input, idx_train)
+    features_test, target_test = prep_split(df_input, idx_test)
+    features_val, target_val = prep_split(df_input, idx_val)
 
     return features_train, target_train, features_test, target_test, features_val, target_val
 
@@ -0,0 +1,307 @@
+# This script records what the training data looked like as compact per-feature sketches
+# and monitors new track batches against this baseline to decide when to retrain the final model
+    # Numeric features: histogram counts on bin edges taken from the training quantiles (quantile sketch)
+    # Categorical features ('key', 'time_signature', 'popularity_cat'): category frequencies
+# New batches are streamed chunk by chunk and only update the fixed size counts (constant memory),
+# the drift report compares the counts with the baseline by PSI and KS statistic
+
+import os, sys
+import json
+import argparse
+import numpy as np
+import pandas as pd
+
+# get path to main directory to import the data prep functions properly
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.data_prep_for_model import load_data, clean_data, feature_engineer, FEATURES_TO_DROP
+from src.prep_cache import cached_prep_data_for_model
+
+# global constants
+CAT_COLS = ['key', 'time_signature']
+TARGET_COL = 'popularity_cat'
+N_BINS = 20
+PSI_THRESHOLD = 0.2
+BASELINE_PATH = os.path.join(project_root, 'data', 'drift_baseline.json')
+
+# features counted within a batch: their distribution depends on the batch size,
+# so they can't be compared with the baseline of the whole train split
+BATCH_DEPENDENT_COLS = ['tracks_per_artist']
+
+##################################
+def _bin_edges(values, n_bins):
+    '''Gets the inner bin edges of a numeric feature from its training values.
+    Features with few unique values (e.g. 'explicit', 'mode') get one bin per value,
+    all others get edges at the training quantiles.'''
+
+    unique_values = np.unique(values)
+
+    if len(unique_values) <= n_bins:
+        return ((unique_values[:-1] + unique_values[1:]) / 2).tolist()
+
+    quantiles = np.quantile(values, np.linspace(0, 1, n_bins + 1)[1:-1])
+
+    return np.unique(quantiles).tolist()
+
+##################################
+def create_sketch(features, target=None, cat_cols=CAT_COLS, n_bins=N_BINS):
+    '''Creates an empty sketch whose bins and categories are derived from the training features.
+
+    Args:
+        features (pd.DataFrame): Training features (e.g. features_train of prep_data_for_model).
+        target (pd.Series): Optional training target, tracked as categorical feature.
+        cat_cols (list): List of categorical columns from features (default is CAT_COLS).
+        n_bins (int): Number of histogram bins per numeric feature (default is N_BINS).
+
+    Returns:
+        sketch (dict): JSON serializable sketch with zero counts.
+
+    '''
+
+    sketch = {'n_rows': 0, 'numeric': {}, 'categorical': {}}
+
+    for col in features.columns:
+        if col in cat_cols:
+            continue
+        edges = _bin_edges(features[col].to_numpy(dtype=float), n_bins)
+        sketch['numeric'][col] = {'edges': edges, 'counts': [0] * (len(edges) + 1)}
+
+    categorical = {col: features[col] for col in cat_cols}
+    if target is not None:
+        categorical[TARGET_COL] = target
+
+    for col, series in categorical.items():
+        categories = sorted(series.dropna().unique().tolist())
+        # last count collects categories not seen in training
+        sketch['categorical'][col] = {'categories': categories, 'counts': [0] * (len(categories) + 1)}
+
+    return sketch
+
+##################################
+def update_sketch(sketch, features, target=None):
+    '''Updates the counts of a sketch incrementally with a batch (in place).
+
+    Args:
+        sketch (dict): Sketch created by create_sketch or empty_like.
+        features (pd.DataFrame): Features of the batch with the same columns as in training.
+        target (pd.Series): Optional target of the batch.
+
+    Returns:
+        sketch (dict): The updated sketch.
+
+    '''
+
+    sketch['n_rows'] += len(features)
+
+    for col, hist in sketch['numeric'].items():
+        values = features[col].to_numpy(dtype=float)
+        values = values[~np.isnan(values)]
+        bins = np.searchsorted(hist['edges'], values, side='right')
+        counts = np.bincount(bins, minlength=len(hist['counts']))
+        hist['counts'] = (np.asarray(hist['counts']) + counts).tolist()
+
+    for col, freq in sketch['categorical'].items():
+        if col == TARGET_COL:
+            if target is None:
+                continue
+            series = target
+        else:
+            series = features[col]
+        codes = pd.Categorical(series.dropna(), categories=freq['categories']).codes
+        # code -1 (unseen category) ends up in the last count
+        counts = np.bincount(np.where(codes < 0, len(freq['categories']), codes), minlength=len(freq['counts']))
+        freq['counts'] = (np.asarray(freq['counts']) + counts).tolist()
+
+    return sketch
+
+##################################
+def build_baseline(features, target=None, cat_cols=CAT_COLS, n_bins=N_BINS):
+    '''Builds the baseline sketch of the training data.
+
+    Args:
+        features (pd.DataFrame): Training features (e.g. features_train of prep_data_for_model).
+        target (pd.Series): Optional training target (e.g. target_train).
+        cat_cols (list): List of categorical columns from features (default is CAT_COLS).
+        n_bins (int): Number of histogram bins per numeric feature (default is N_BINS).
+
+    Returns:
+        baseline (dict): JSON serializable sketch with the training counts.
+
+    '''
+
+    sketch = create_sketch(features, target, cat_cols=cat_cols, n_bins=n_bins)
+
+    return update_sketch(sketch, features, target)
+
+##################################
+def empty_like(baseline):
+    '''Returns a sketch with the bins and categories of the baseline and zero counts.'''
+
+    sketch = json.loads(json.dumps(baseline))
+    sketch['n_rows'] = 0
+    for part in ('numeric', 'categorical'):
+        for entry in sketch[part].values():
+            entry['counts'] = [0] * len(entry['counts'])
+
+    return sketch
+
+##################################
+def save_baseline(baseline, path=BASELINE_PATH):
+    '''Saves the baseline sketch as JSON file.'''
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as file:
+        json.dump(baseline, file)
+
+##################################
+def load_baseline(path=BASELINE_PATH):
+    '''Loads a baseline sketch from a JSON file.'''
+
+    with open(path) as file:
+        return json.load(file)
+
+##################################
+def population_stability_index(expected_counts, actual_counts, eps=1e-4):
+    '''Computes the population stability index (PSI) of two count arrays over the same bins.
+    Rule of thumb: < 0.1 no drift, 0.1 - 0.2 moderate drift, > 0.2 significant drift.'''
+
+    expected = np.asarray(expected_counts, dtype=float)
+    actual = np.asarray(actual_counts, dtype=float)
+
+    # shares with a small floor to avoid log(0)
+    expected = np.clip(expected / max(expected.sum(), 1), eps, None)
+    actual = np.clip(actual / max(actual.sum(), 1), eps, None)
+
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+##################################
+def ks_statistic(expected_counts, actual_counts):
+    '''Computes the Kolmogorov-Smirnov statistic of two count arrays over the same ordered bins
+    (maximum distance of the cumulative shares, evaluated at the bin edges).'''
+
+    expected = np.cumsum(expected_counts) / max(np.sum(expected_counts), 1)
+    actual = np.cumsum(actual_counts) / max(np.sum(actual_counts), 1)
+
+    return float(np.max(np.abs(expected - actual)))
+
+##################################
+def drift_report(baseline, sketch, psi_threshold=PSI_THRESHOLD):
+    '''Compares the counts of a monitoring sketch with the baseline per feature.
+
+    Args:
+        baseline (dict): Baseline sketch of the training data.
+        sketch (dict): Sketch of the new data (with the bins of the baseline).
+        psi_threshold (float): PSI above which a feature counts as drifted (default is PSI_THRESHOLD).
+
+    Returns:
+        df_report (pd.DataFrame): One row per feature with the columns 'feature', 'type',
+            'psi', 'ks' (NaN for unordered categories), 'n_rows', 'comparable' and 'drift', sorted by psi.
+            Batch dependent features (BATCH_DEPENDENT_COLS) are not comparable, they get NaN
+            scores and never count as drifted.
+
+    '''
+
+    rows = []
+    for part in ('numeric', 'categorical'):
+        for col, entry in sketch[part].items():
+            expected = baseline[part][col]['counts']
+            actual = entry['counts']
+            comparable = col not in BATCH_DEPENDENT_COLS
+            rows.append({
+                'feature': col,
+                'type': part,
+                'psi': population_stability_index(expected, actual) if comparable else np.nan,
+                # popularity_cat is ordered as well, but its categories are sorted by name
+                'ks': ks_statistic(expected, actual) if comparable and col != TARGET_COL else np.nan,
+                'n_rows': int(np.sum(actual)),
+                'comparable': comparable,
+            })
+
+    df_report = pd.DataFrame(rows, columns=['feature', 'type', 'psi', 'ks', 'n_rows', 'comparable'])
+    # NaN > threshold is False, so not comparable features never drift
+    df_report['drift'] = df_report['psi'] > psi_threshold
+
+    return df_report.sort_values(by='psi', ascending=False).reset_index(drop=True)
+
+##################################
+def prepare_batch(df_input):
+    '''Prepares a raw batch of tracks (same layout as the training dataset) like the training data.
+
+    Args:
+        df_input (pd.DataFrame): Raw batch of tracks.
+
+    Returns:
+        features (pd.DataFrame): Features of the batch.
+        target (pd.Series): Target of the batch.
+
+    '''
+
+    df = feature_engineer(clean_data(df_input))
+
+    return df.drop(FEATURES_TO_DROP, axis=1), df[TARGET_COL]
+
+##################################
+def monitor_batches(baseline, batches):
+    '''Streams raw batches of tracks and updates a monitoring sketch batch by batch,
+    so only one batch is held in memory at once.
+    Note: 'tracks_per_artist' is counted within each batch, so drift_report marks it as not comparable.
+
+    Args:
+        baseline (dict): Baseline sketch of the training data.
+        batches (iterable): Iterable of raw DataFrames, e.g. load_data(path, chunksize=10000).
+
+    Returns:
+        sketch (dict): Sketch of all streamed batches.
+
+    '''
+
+    sketch = empty_like(baseline)
+
+    for batch in batches:
+        features, target = prepare_batch(batch)
+        update_sketch(sketch, features, target)
+
+    return sketch
+
+
+# %% main
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Drift monitoring against the training baseline.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    parser_baseline = subparsers.add_parser('baseline', help='store the sketches of the training data')
+    parser_baseline.add_argument('--data', default='data/spotify_dataset.csv')
+
+    parser_monitor = subparsers.add_parser('monitor', help='stream new tracks and report drift')
+    parser_monitor.add_argument('data', help='csv file with new tracks')
+    parser_monitor.add_argument('--chunksize', type=int, default=10000)
+
+    args = parser.parse_args()
+
+    if args.command == 'baseline':
+        print("load data")
+        data = load_data(args.data)
+
+        print("prepare data for model")
+        features_train, target_train, _, _, _, _ = cached_prep_data_for_model(data)
+
+        print("store baseline sketches of train data")
+        save_baseline(build_baseline(features_train, target_train))
+        print(f"baseline saved to {BASELINE_PATH}")
+
+    else:
+        print("load baseline")
+        baseline = load_baseline()
+
+        print("stream new tracks")
+        sketch = monitor_batches(baseline, load_data(args.data, chunksize=args.chunksize))
+
+        df_report = drift_report(baseline, sketch)
+        print(df_report.to_string(index=False))
+
+        if df_report['drift'].any():
+            print("drift detected, retraining the final model is recommended")
+        else:
+            print("no significant drift detected")
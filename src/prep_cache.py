@@ -0,0 +1,184 @@
+# This script caches the six outputs of prep_data_for_model on disk, so notebooks and scripts
+# can skip the whole prep stage if neither the data nor the prep code changed
+    # Key: hash of the input DataFrame + version of the prep code (source of data_prep_for_model.py)
+    # Format: pickle files (fast binary, keeps all dtypes), only load cache files created by this script
+    # Eviction: least recently used files are removed if the cache grows above a size limit
+
+import os, sys
+import pickle
+import hashlib
+import inspect
+import numpy as np
+import pandas as pd
+import sklearn
+
+# get path to main directory to import the data prep functions properly
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import src.data_prep_for_model as data_prep_for_model
+
+# global constants
+CACHE_DIR = os.path.join(project_root, '.cache', 'prep_data')
+MAX_SIZE_MB = 500
+
+##################################
+def data_hash(df_input):
+    '''Hashes the content of a DataFrame (values, index, column names and dtypes).
+
+    Args:
+        df_input (pd.DataFrame): The input DataFrame.
+
+    Returns:
+        digest (str): Hex digest of the DataFrame.
+
+    '''
+
+    hasher = hashlib.sha256()
+
+    # column names and dtypes, so e.g. load_data and read_csv frames get different keys
+    hasher.update(repr([(col, str(dtype)) for col, dtype in df_input.dtypes.items()]).encode())
+
+    # one 64 bit hash per row of the index, then column by column
+    hasher.update(pd.util.hash_pandas_object(df_input.index).to_numpy().tobytes())
+    for position in range(df_input.shape[1]):
+        hasher.update(_column_bytes(df_input.iloc[:, position]))
+
+    return hasher.hexdigest()
+
+##################################
+def _column_bytes(series):
+    '''Gets the bytes to hash for one column. Arrow-backed strings (see load_data) are hashed as
+    Arrow buffers, hash_pandas_object would convert them to Python strings first.'''
+
+    if isinstance(series.dtype, pd.StringDtype) and series.dtype.storage == 'pyarrow':
+        import pyarrow as pa
+
+        arr = pa.array(series.array)
+        if isinstance(arr, pa.ChunkedArray):
+            arr = arr.combine_chunks()
+        # concatenating copies slices into fresh buffers, so equal values give equal bytes
+        arr = pa.concat_arrays([arr, pa.array([], type=arr.type)])
+
+        return memoryview(pa.record_batch([arr], names=['value']).serialize())
+
+    return np.ascontiguousarray(pd.util.hash_pandas_object(series, index=False).to_numpy()).tobytes()
+
+##################################
+def code_version():
+    '''Gets the version of the prep code as hash of the data_prep_for_model.py source and the
+    pandas, numpy (pickled DataFrames depend on them) and scikit-learn (train_test_split) versions.'''
+
+    source = inspect.getsource(data_prep_for_model)
+    versions = f'{pd.__version__}-{np.__version__}-{sklearn.__version__}'
+
+    return hashlib.sha256(f'{source}{versions}'.encode()).hexdigest()
+
+##################################
+def cache_key(df_input, stratify=False):
+    '''Gets the cache key of a prep_data_for_model call.'''
+
+    key = f'{data_hash(df_input)}-{code_version()}-{stratify}'
+
+    return hashlib.sha256(key.encode()).hexdigest()[:32]
+
+##################################
+def cached_prep_data_for_model(df_input, stratify=False, cache_dir=CACHE_DIR, max_size_mb=MAX_SIZE_MB):
+    '''Same as prep_data_for_model, but the results are loaded from the disk cache if the
+    input data and the prep code are unchanged.
+
+    Args:
+        df_input (pd.DataFrame): The input DataFrame to be prepped.
+        stratify (bool): Stratify the splits on the popularity categories (default is False).
+        cache_dir (str): Directory of the cache files (default is CACHE_DIR).
+        max_size_mb (float): Size limit of the cache directory in MB (default is MAX_SIZE_MB).
+
+    Returns:
+        features_train (pd.DataFrame): Features of train set.
+        target_train (pd.Series): Target of train set.
+        features_test (pd.DataFrame): Features of test set.
+        target_test (pd.Series): Target of test set.
+        features_val(pd.DataFrame): Features of val set.
+        target_val (pd.Series): Target of val set.
+
+    '''
+
+    path = os.path.join(cache_dir, f'{cache_key(df_input, stratify)}.pkl')
+
+    # cache hit: load results and mark the file as recently used
+    if os.path.exists(path):
+        try:
+            with open(path, 'rb') as file:
+                results = pickle.load(file)
+            os.utime(path)
+            return results
+        except Exception:
+            # broken or incompatible file (e.g. pickled with other library versions), prep again
+            pass
+
+    results = data_prep_for_model.prep_data_for_model(df_input, stratify=stratify)
+
+    # caching is best-effort: if writing fails (read-only checkout, full disk, ...) just return the results
+    # write to a temporary file first, so other processes never read half written files
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(tmp_path, 'wb') as file:
+            pickle.dump(results, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        evict_cache(cache_dir, max_size_mb)
+    except (OSError, pickle.PicklingError):
+        pass
+    finally:
+        # only left if writing failed
+        if os.path.exists(tmp_path):
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    return results
+
+##################################
+def evict_cache(cache_dir=CACHE_DIR, max_size_mb=MAX_SIZE_MB):
+    '''Removes the least recently used cache files until the cache fits the size limit.
+
+    Args:
+        cache_dir (str): Directory of the cache files (default is CACHE_DIR).
+        max_size_mb (float): Size limit of the cache directory in MB (default is MAX_SIZE_MB).
+
+    Returns:
+        removed (list): Paths of the removed files.
+
+    '''
+
+    if not os.path.isdir(cache_dir):
+        return []
+
+    entries = []
+    for entry in os.scandir(cache_dir):
+        if entry.is_file() and entry.name.endswith('.pkl'):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+    # oldest first
+    entries.sort()
+    total_size = sum(size for _, size, _ in entries)
+    max_size = max_size_mb * 1024 ** 2
+
+    removed = []
+    for _, size, path in entries:
+        if total_size <= max_size:
+            break
+        os.remove(path)
+        total_size -= size
+        removed.append(path)
+
+    return removed
+
+##################################
+def clear_cache(cache_dir=CACHE_DIR):
+    '''Removes all cache files.'''
+
+    return evict_cache(cache_dir, max_size_mb=0)
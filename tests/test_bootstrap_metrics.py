@@ -0,0 +1,80 @@
+# pytests for the bootstrap_metrics.py script
+
+import os, sys
+import pytest
+import numpy as np
+from sklearn.metrics import f1_score, precision_score, recall_score, confusion_matrix
+
+# get path to main directory to import the bootstrap functions properly
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.bootstrap_metrics import weighted_scores, bootstrap_metrics, bootstrap_metrics_difference
+
+# define a fixture for cached sample predictions
+@pytest.fixture
+def sample_predictions():
+    '''Creates a random target and two sets of predictions with the popularity categories.'''
+
+    rng = np.random.default_rng(42)
+    labels = np.array(['Unknown', 'Low', 'Medium', 'High'])
+    target = rng.choice(labels, size=500, p=[0.1, 0.3, 0.5, 0.1])
+
+    # predictions that are right most of the time
+    predictions_a = np.where(rng.random(500) < 0.7, target, rng.choice(labels, size=500))
+    predictions_b = np.where(rng.random(500) < 0.6, target, rng.choice(labels, size=500))
+
+    return target, predictions_a, predictions_b
+
+def test_weighted_scores_match_sklearn(sample_predictions):
+    '''Test that the vectorized scores match sklearn's weighted scores.'''
+
+    target, predictions, _ = sample_predictions
+
+    scores = weighted_scores(confusion_matrix(target, predictions))
+
+    assert scores['f1'][0] == pytest.approx(f1_score(target, predictions, average='weighted'))
+    assert scores['precision'][0] == pytest.approx(precision_score(target, predictions, average='weighted'))
+    assert scores['recall'][0] == pytest.approx(recall_score(target, predictions, average='weighted'))
+
+def test_bootstrap_metrics_interval_contains_score(sample_predictions):
+    '''Test that the interval contains the score on the full data.'''
+
+    target, predictions, _ = sample_predictions
+
+    df_intervals = bootstrap_metrics(target, predictions, n_replicates=1000, n_jobs=1)
+
+    assert list(df_intervals['metric']) == ['f1', 'precision', 'recall']
+    assert (df_intervals['lower'] <= df_intervals['score']).all()
+    assert (df_intervals['score'] <= df_intervals['upper']).all()
+
+def test_bootstrap_metrics_reproducible_across_jobs(sample_predictions):
+    '''Test that the intervals do not depend on the number of worker processes.'''
+
+    target, predictions, _ = sample_predictions
+
+    df_single = bootstrap_metrics(target, predictions, n_replicates=1200, n_jobs=1)
+    df_pool = bootstrap_metrics(target, predictions, n_replicates=1200, n_jobs=2)
+
+    assert df_single.equals(df_pool), 'Intervals differ between single process and process pool.'
+
+def test_bootstrap_metrics_difference_of_same_model_is_zero(sample_predictions):
+    '''Test that comparing a model with itself gives a zero difference.'''
+
+    target, predictions, _ = sample_predictions
+
+    df_intervals = bootstrap_metrics_difference(target, predictions, predictions, n_replicates=500, n_jobs=1)
+
+    assert np.allclose(df_intervals[['score', 'lower', 'upper']], 0)
+
+@pytest.mark.parametrize('n_replicates', [0, 1])
+def test_bootstrap_metrics_rejects_too_few_replicates(sample_predictions, n_replicates):
+    '''Test that less than two replicates raise a ValueError.'''
+
+    target, predictions_a, predictions_b = sample_predictions
+
+    with pytest.raises(ValueError, match='n_replicates'):
+        bootstrap_metrics(target, predictions_a, n_replicates=n_replicates)
+    with pytest.raises(ValueError, match='n_replicates'):
+        bootstrap_metrics_difference(target, predictions_a, predictions_b, n_replicates=n_replicates)
@@ -0,0 +1,170 @@
+# pytests for the data_prep_for_model.py script
+
+import os, sys
+import pytest
+import pandas as pd
+import numpy as np
+from sklearn.model_selection import train_test_split
+
+# get path to main directory to import the data prep functions properly
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.data_prep_for_model import (load_data, clean_data, feature_engineer, split_indices, kfold_indices,
+                                     prep_data_for_model, CATEGORY_COLS, FEATURES_TO_DROP)
+
+# define a fixture for a sample dataframe with the string columns
+@pytest.fixture
+def sample_df():
+    '''Creates a sample dataframe with the string columns used by feature_engineer.'''
+
+    np.random.seed(42)  # for reproducibility in tests
+    df = pd.DataFrame({
+        'track_id': [f'id_{i}' for i in range(20)],
+        'artists': np.random.choice(['Artist A', 'B', 'Artist C;Artist D'], size=20),
+        'album_name': np.random.choice(['Album', 'Another Album', 'X'], size=20),
+        'track_name': [f'Track {"x" * i}' for i in range(20)],
+        'track_genre': np.random.choice(['pop', 'rock'], size=20),
+    })
+
+    return df
+
+# define a fixture for a sample dataframe with popularity values
+@pytest.fixture
+def popularity_df():
+    '''Creates a sample dataframe with popularity values for the split functions.'''
+
+    np.random.seed(42)  # for reproducibility in tests
+    popularity = np.random.choice([0, 10, 50, 80], size=300, p=[0.1, 0.3, 0.4, 0.2])
+
+    return pd.DataFrame({'popularity': popularity, 'value': np.arange(300)})
+
+# define a fixture for a raw dataframe with the layout of the spotify dataset
+@pytest.fixture
+def raw_df():
+    '''Creates a raw sample dataframe incl. duplicated rows and NaN values.'''
+
+    np.random.seed(42)  # for reproducibility in tests
+    n = 200
+    num_cols = ['duration_ms', 'danceability', 'energy', 'loudness', 'speechiness', 'acousticness',
+                'instrumentalness', 'liveness', 'valence', 'tempo']
+    df = pd.DataFrame({
+        'Unnamed: 0': np.arange(n),
+        'track_id': [f'id_{i}' for i in range(n)],
+        'artists': np.random.choice([f'artist_{i}' for i in range(15)], size=n),
+        'album_name': np.random.choice([f'album_{i}' for i in range(30)], size=n),
+        'track_name': [f'track {i}' for i in range(n)],
+        'popularity': np.random.randint(0, 101, size=n),
+        'explicit': np.random.rand(n) < 0.2,
+        'key': np.random.randint(0, 12, size=n),
+        'mode': np.random.randint(0, 2, size=n),
+        'time_signature': np.random.choice([3, 4, 5], size=n),
+        'track_genre': np.random.choice(['pop', 'rock', 'jazz'], size=n),
+        **{col: np.random.rand(n) for col in num_cols},
+    })
+
+    # duplicated tracks (other track_id) and missing values
+    duplicates = df.iloc[:30].copy()
+    duplicates['track_id'] = [f'dup_{i}' for i in range(30)]
+    df = pd.concat([df, duplicates], ignore_index=True)
+    df.loc[[5, 50, 150], 'album_name'] = np.nan
+    df.loc[[7, 70], 'track_name'] = np.nan
+
+    return df
+
+def test_feature_engineer_categorical_matches_strings(sample_df):
+    '''Test that categorical string columns give the same features as plain string columns.'''
+
+    df_categorical = sample_df.astype({col: 'category' for col in CATEGORY_COLS})
+
+    features_strings = feature_engineer(sample_df)
+    features_categorical = feature_engineer(df_categorical)
+
+    for col in ['tracks_per_artist', 'track_name_length', 'album_name_length']:
+        pd.testing.assert_series_equal(features_strings[col], features_categorical[col])
+
+def test_feature_engineer_categorical_with_missing_values(sample_df):
+    '''Test that missing values in categorical columns give NaN features like plain strings do.'''
+
+    sample_df.loc[3, 'album_name'] = np.nan
+    df_categorical = sample_df.astype({col: 'category' for col in CATEGORY_COLS})
+
+    features_categorical = feature_engineer(df_categorical)
+
+    assert np.isnan(features_categorical.loc[3, 'album_name_length'])
+    assert features_categorical['album_name_length'].drop(3).notna().all()
+
+def test_load_data_dtypes(sample_df, tmp_path):
+    '''Test that the loader reads the string columns with compact dtypes.'''
+
+    path = tmp_path / 'dataset.csv'
+    sample_df.to_csv(path, index=False)
+
+    df = load_data(path)
+
+    for col in CATEGORY_COLS:
+        assert isinstance(df[col].dtype, pd.CategoricalDtype), f'{col} is not categorical.'
+    assert isinstance(df['track_name'].dtype, pd.StringDtype), 'track_name is not a string dtype.'
+
+def test_split_indices_match_train_test_split(popularity_df):
+    '''Test that the index arrays select the same rows as train_test_split on the DataFrame.'''
+
+    idx_train, idx_test, idx_val = split_indices(popularity_df)
+
+    df_train, df_test = train_test_split(popularity_df, test_size = 0.3, random_state = 42)
+    df_test, df_val = train_test_split(df_test, test_size=0.33, random_state = 42)
+
+    assert popularity_df.iloc[idx_train].equals(df_train)
+    assert popularity_df.iloc[idx_test].equals(df_test)
+    assert popularity_df.iloc[idx_val].equals(df_val)
+
+def test_split_indices_stratified(popularity_df):
+    '''Test that stratified splits keep the share of every popularity category.'''
+
+    idx_train, idx_test, idx_val = split_indices(popularity_df, stratify=True)
+
+    shares = popularity_df['popularity'].value_counts(normalize=True)
+    for idx in (idx_train, idx_test, idx_val):
+        split_shares = popularity_df['popularity'].iloc[idx].value_counts(normalize=True)
+        assert np.allclose(split_shares[shares.index], shares, atol=0.05)
+
+    # the three sets cover all rows exactly once
+    assert np.array_equal(np.sort(np.concatenate([idx_train, idx_test, idx_val])), np.arange(len(popularity_df)))
+
+def test_kfold_indices_partition_train_set(popularity_df):
+    '''Test that the folds split the train index array without overlap.'''
+
+    idx_train, _, _ = split_indices(popularity_df)
+
+    folds = kfold_indices(popularity_df, idx_train, n_splits=5, stratify=True)
+
+    assert len(folds) == 5
+    assert np.array_equal(np.sort(np.concatenate([idx_eval for _, idx_eval in folds])), np.sort(idx_train))
+    for idx_fit, idx_eval in folds:
+        assert len(np.intersect1d(idx_fit, idx_eval)) == 0
+
+def test_prep_data_for_model_matches_previous_pipeline(raw_df):
+    '''Test that prep_data_for_model gives the same results as the previous implementation
+    (copy, train_test_split twice, then clean_data and feature_engineer on every split).'''
+
+    df_input = raw_df.copy()
+
+    # previous implementation
+    df_train, df_test = train_test_split(raw_df.copy(), test_size = 0.3, random_state = 42)
+    df_test, df_val = train_test_split(df_test, test_size=0.33, random_state = 42)
+    expected = []
+    for df_split in (df_train, df_test, df_val):
+        df_final = feature_engineer(clean_data(df_split))
+        expected += [df_final.drop(FEATURES_TO_DROP, axis = 1), df_final['popularity_cat']]
+
+    results = prep_data_for_model(raw_df)
+
+    for result, reference in zip(results, expected):
+        if isinstance(reference, pd.DataFrame):
+            pd.testing.assert_frame_equal(result, reference)
+        else:
+            pd.testing.assert_series_equal(result, reference)
+
+    # the input DataFrame is not changed by the copy=False steps
+    pd.testing.assert_frame_equal(raw_df, df_input)
@@ -0,0 +1,104 @@
+# pytests for the drift_monitoring.py script
+
+import os, sys
+import pytest
+import pandas as pd
+import numpy as np
+
+# get path to main directory to import the drift monitoring functions properly
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.drift_monitoring import (build_baseline, empty_like, update_sketch, drift_report,
+                                  prepare_batch, monitor_batches, save_baseline, load_baseline)
+
+def make_tracks(n, seed, shift=0.0):
+    '''Creates a raw dataframe with the layout of the spotify dataset.'''
+
+    rng = np.random.default_rng(seed)
+
+    return pd.DataFrame({
+        'track_id': [f'id_{seed}_{i}' for i in range(n)],
+        'artists': rng.choice([f'artist_{i}' for i in range(50)], size=n),
+        'album_name': rng.choice([f'album_{i}' for i in range(80)], size=n),
+        'track_name': [f'track {i}' for i in range(n)],
+        'popularity': rng.integers(0, 101, size=n),
+        'duration_ms': rng.normal(200000 + shift * 100000, 30000, size=n),
+        'explicit': rng.random(n) < 0.1,
+        'danceability': rng.random(n),
+        'energy': np.clip(rng.random(n) + shift, 0, 1),
+        'key': rng.integers(0, 12, size=n),
+        'loudness': rng.normal(-8, 3, size=n),
+        'mode': rng.integers(0, 2, size=n),
+        'speechiness': rng.random(n),
+        'acousticness': rng.random(n),
+        'instrumentalness': rng.random(n),
+        'liveness': rng.random(n),
+        'valence': rng.random(n),
+        'tempo': rng.normal(120, 25, size=n),
+        'time_signature': rng.choice([3, 4, 5], size=n, p=[0.1, 0.8, 0.1]),
+        'track_genre': rng.choice(['pop', 'rock', 'jazz'], size=n),
+    })
+
+# define a fixture for a baseline of sample training data
+@pytest.fixture
+def baseline():
+    '''Creates the baseline sketch of a sample training dataset.'''
+
+    features, target = prepare_batch(make_tracks(3000, seed=1))
+
+    return build_baseline(features, target)
+
+def test_no_drift_on_same_distribution(baseline):
+    '''Test that new data from the training distribution is not reported as drift.'''
+
+    sketch = monitor_batches(baseline, [make_tracks(3000, seed=2)])
+    df_report = drift_report(baseline, sketch)
+
+    assert not df_report['drift'].any()
+
+def test_drift_on_shifted_distribution(baseline):
+    '''Test that shifted features are reported as drift.'''
+
+    sketch = monitor_batches(baseline, [make_tracks(3000, seed=2, shift=0.5)])
+    df_report = drift_report(baseline, sketch).set_index('feature')
+
+    assert df_report.loc['duration_ms', 'drift']
+    assert df_report.loc['energy', 'drift']
+    assert not df_report.loc['danceability', 'drift']
+
+def test_no_drift_on_streamed_training_rows():
+    '''Test that streaming the raw training rows in chunks reports no drift,
+    batch dependent features are reported as not comparable.'''
+
+    df_train = make_tracks(3000, seed=1)
+    features, target = prepare_batch(df_train)
+    baseline = build_baseline(features, target)
+
+    chunks = (df_train.iloc[start:start + 500] for start in range(0, len(df_train), 500))
+    df_report = drift_report(baseline, monitor_batches(baseline, chunks)).set_index('feature')
+
+    assert not df_report['drift'].any(), 'Training rows streamed in chunks are reported as drift.'
+    assert not df_report.loc['tracks_per_artist', 'comparable']
+    assert df_report.drop('tracks_per_artist')['comparable'].all()
+
+def test_update_sketch_is_additive(baseline):
+    '''Test that updating a sketch with slices of prepared features gives the same counts as one update.'''
+
+    features, target = prepare_batch(make_tracks(900, seed=3))
+
+    sketch_single = update_sketch(empty_like(baseline), features, target)
+    sketch_stream = empty_like(baseline)
+    for start in range(0, len(features), 200):
+        update_sketch(sketch_stream, features.iloc[start:start + 200], target.iloc[start:start + 200])
+
+    assert sketch_single == sketch_stream, 'Streamed counts differ from single update.'
+
+def test_save_and_load_baseline(baseline, tmp_path):
+    '''Test that the baseline survives a round trip through the JSON file.'''
+
+    path = tmp_path / 'baseline.json'
+    save_baseline(baseline, path)
+
+    assert load_baseline(path) == baseline
@@ -0,0 +1,114 @@
+# pytests for the prep_cache.py script
+
+import os, sys
+import pytest
+import pickle
+import pandas as pd
+import numpy as np
+
+# get path to main directory to import the cache functions properly
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import src.prep_cache as prep_cache
+from src.prep_cache import cached_prep_data_for_model, cache_key, evict_cache
+
+# define a fixture for a sample dataframe and a counter of prep runs
+@pytest.fixture
+def sample_df(monkeypatch):
+    '''Creates a sample dataframe and replaces prep_data_for_model by a counting dummy.'''
+
+    np.random.seed(42)  # for reproducibility in tests
+    df = pd.DataFrame({'popularity': np.random.randint(0, 101, size=50), 'value': np.random.rand(50)})
+
+    calls = []
+    def prep_dummy(df_input, stratify=False):
+        calls.append(stratify)
+        return (df_input, df_input['popularity']) * 3
+
+    monkeypatch.setattr(prep_cache.data_prep_for_model, 'prep_data_for_model', prep_dummy)
+
+    return df, calls
+
+def test_cache_hit_skips_prep(sample_df, tmp_path):
+    '''Test that the second call with the same data loads the results from the cache.'''
+
+    df, calls = sample_df
+
+    results_first = cached_prep_data_for_model(df, cache_dir=tmp_path)
+    results_second = cached_prep_data_for_model(df.copy(), cache_dir=tmp_path)
+
+    assert len(calls) == 1, 'prep_data_for_model ran again on a cache hit.'
+    assert len(results_second) == 6
+    pd.testing.assert_frame_equal(results_first[0], results_second[0])
+
+def test_cache_key_changes_with_data_and_options(sample_df):
+    '''Test that changed data, dtypes or options lead to a new cache key.'''
+
+    df, _ = sample_df
+
+    df_changed = df.copy()
+    df_changed.loc[0, 'value'] += 1
+
+    assert cache_key(df) == cache_key(df.copy())
+    assert cache_key(df) != cache_key(df_changed)
+    assert cache_key(df) != cache_key(df.astype({'popularity': 'float64'}))
+    assert cache_key(df) != cache_key(df, stratify=True)
+
+def test_incompatible_cache_file_is_a_miss(sample_df, tmp_path):
+    '''Test that a cache file that can't be unpickled (e.g. missing module) is prepped again.'''
+
+    df, calls = sample_df
+
+    # pickle that refers to a module which doesn't exist
+    path = tmp_path / f'{cache_key(df)}.pkl'
+    path.write_bytes(b'\x80\x04cno_such_module\nno_such_class\n.')
+
+    results = cached_prep_data_for_model(df, cache_dir=tmp_path)
+
+    assert len(calls) == 1
+    assert len(results) == 6
+
+def test_failed_write_returns_results_and_leaves_no_temporary_file(sample_df, tmp_path, monkeypatch):
+    '''Test that the results are returned and the temporary file is removed if writing the cache file fails.'''
+
+    df, calls = sample_df
+
+    def dump_failing(*args, **kwargs):
+        raise pickle.PicklingError('not picklable')
+
+    monkeypatch.setattr(prep_cache.pickle, 'dump', dump_failing)
+
+    results = cached_prep_data_for_model(df, cache_dir=tmp_path)
+
+    assert len(calls) == 1
+    assert len(results) == 6
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+
+def test_unwritable_cache_dir_returns_results(sample_df, tmp_path):
+    '''Test that the results are returned if the cache directory can't be created.'''
+
+    df, calls = sample_df
+
+    # a file in the way of the cache directory
+    blocker = tmp_path / 'blocker'
+    blocker.write_bytes(b'')
+
+    results = cached_prep_data_for_model(df, cache_dir=blocker / 'cache')
+
+    assert len(calls) == 1
+    assert len(results) == 6
+
+def test_evict_cache_removes_least_recently_used(tmp_path):
+    '''Test that eviction removes the oldest files until the size limit is met.'''
+
+    for i, name in enumerate(['old', 'middle', 'new']):
+        path = tmp_path / f'{name}.pkl'
+        path.write_bytes(b'0' * 400 * 1024)
+        os.utime(path, (1000 + i, 1000 + i))
+
+    removed = evict_cache(tmp_path, max_size_mb=1)
+
+    assert [os.path.basename(path) for path in removed] == ['old.pkl']
+    assert sorted(os.listdir(tmp_path)) == ['middle.pkl', 'new.pkl']